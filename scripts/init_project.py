@@ -10,15 +10,33 @@ and replaces all template values across the codebase.
 Requirements: Python 3.8+ (stdlib only, no extra dependencies).
 """
 
+import collections
+import errno
+import mmap
 import os
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 # ── Configuration ────────────────────────────────────────────────────────────
 
-SKIP_DIRS = {".git", "venv", "__pycache__", "target", "dbt_packages", "logs", ".sqlfluff_cache"}
-BINARY_EXTENSIONS = {".csv", ".pptx", ".xlsx", ".png", ".jpg", ".gif", ".ico", ".woff", ".woff2", ".pyc"}
+SKIP_DIRS = frozenset({".git", "venv", "__pycache__", "target", "dbt_packages", "logs", ".sqlfluff_cache"})
+BINARY_EXTENSIONS = frozenset({".csv", ".pptx", ".xlsx", ".png", ".jpg", ".gif", ".ico", ".woff", ".woff2", ".pyc"})
+
+# Files with a NUL byte in their first SNIFF_BYTES are treated as binary
+SNIFF_BYTES = 8192
+
+# Files at least this large are checked for template values via mmap before reading
+MMAP_THRESHOLD = 1 << 20
+
+# Suffix for temp files that staged content is written to before os.replace
+TMP_SUFFIX = ".init.tmp"
+
+# File I/O is syscall-bound and releases the GIL, so threads overlap it well
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 PROMPTS = [
     ("project_name",   "Project name (dbt_project.yml)",  "ci_cd_project"),
@@ -55,76 +73,160 @@ def prompt_values():
     return values
 
 
-def collect_text_files(root):
-    """Walk the project and return all text file paths (skipping binary/ignored dirs)."""
-    text_files = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        # Skip ignored directories (modify dirnames in-place to prevent descent)
-        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
-
-        for filename in filenames:
-            _, ext = os.path.splitext(filename)
-            if ext.lower() in BINARY_EXTENSIONS:
+def _walk_text_files(dirpath):
+    """Yield text file paths under dirpath, pruning SKIP_DIRS via os.scandir."""
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                # Like os.walk, do not descend into symlinked directories
+                if entry.name not in SKIP_DIRS and not entry.is_symlink():
+                    yield from _walk_text_files(entry.path)
                 continue
-            filepath = os.path.join(dirpath, filename)
-            text_files.append(filepath)
-
-    return text_files
+            name = entry.name
+            dot = name.rfind(".")
+            if dot > 0 and name[dot:].lower() in BINARY_EXTENSIONS:
+                continue
+            yield entry.path
 
 
-def count_replacements(files, old, new):
-    """Count how many times old appears across all files (content only)."""
-    if old == new:
-        return 0, 0
-    total_count = 0
-    file_count = 0
-    for filepath in files:
-        try:
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            count = content.count(old)
-            if count > 0:
-                total_count += count
-                file_count += 1
-        except (OSError, UnicodeDecodeError):
+def collect_text_files(root):
+    """Walk the project and return all text file paths (skipping binary/ignored dirs)."""
+    return list(_walk_text_files(root))
+
+
+def _scan_file(filepath, pattern, mapping, needles):
+    """Read one file as bytes and return (filepath, new_raw, counts), or None if untouched."""
+    try:
+        with open(filepath, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            # Skip empty files and binaries that slipped past BINARY_EXTENSIONS
+            if not head or b"\x00" in head:
+                return None
+            if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                # Search mapped pages directly; skip the read if no value occurs
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if not any(mm.find(needle) >= 0 for needle in needles):
+                        return None
+            raw = head + f.read()
+    except OSError:
+        return None
+    # Fast reject: most files contain none of the template values
+    if not any(needle in raw for needle in needles):
+        return None
+    counts = collections.Counter()
+    get = mapping.__getitem__
+
+    def repl(m):
+        old = m.group()
+        counts[old] += 1
+        return get(old)
+
+    new_raw = pattern.sub(repl, raw)
+    if not counts:
+        return None
+    return filepath, new_raw, counts
+
+
+def compile_replacements(pairs):
+    """Encode (old, new) pairs once and compile them into a single bytes regex.
+
+    Returns (pattern, {old_bytes: new_bytes}). Alternatives are ordered
+    longest-first so that values sharing a prefix match greedily.
+    """
+    mapping = {old.encode("utf-8"): new.encode("utf-8") for old, new in pairs}
+    alternatives = sorted(mapping, key=len, reverse=True)
+    pattern = re.compile(b"|".join(re.escape(old) for old in alternatives))
+    return pattern, mapping
+
+
+def scan_and_stage(files, pattern, mapping):
+    """Read each file once, counting matches and staging the replaced content.
+
+    Contents stay as bytes end to end (see compile_replacements).
+    Returns ({filepath: (new_raw, occurrences)}, {old: (occurrences, file_count)}).
+    """
+    if not mapping:
+        return {}, {}
+    staged = {}
+    totals = {old: [0, 0] for old in mapping}
+    needles = list(mapping)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(
+            lambda path: _scan_file(path, pattern, mapping, needles), files,
+        ))
+    for result in results:
+        if result is None:
             continue
-    return total_count, file_count
-
-
-def replace_in_files(files, old, new):
-    """Replace all occurrences of old with new in file contents."""
-    if old == new:
-        return 0
-    total = 0
-    for filepath in files:
-        try:
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            count = content.count(old)
-            if count > 0:
-                new_content = content.replace(old, new)
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(new_content)
-                total += count
-        except (OSError, UnicodeDecodeError):
+        filepath, new_raw, counts = result
+        # Stage the link target, so symlinks are written through (and counted once)
+        filepath = os.path.realpath(filepath)
+        if filepath in staged:
             continue
-    return total
-
-
-def rename_path(root, old_name, new_name):
-    """Rename a file or directory under root. Returns True if renamed."""
-    if old_name == new_name:
-        return False
+        staged[filepath] = (new_raw, sum(counts.values()))
+        for old, count in counts.items():
+            totals[old][0] += count
+            totals[old][1] += 1
+    return staged, {old.decode("utf-8"): tuple(t) for old, t in totals.items()}
+
+
+def _write_file(item):
+    """Atomically write one staged item back to disk. Returns the OSError, or None on success."""
+    filepath, (new_raw, _) = item
+    # Write a sibling temp file and swap it in, so a failure never truncates the original.
+    # mkstemp uses O_EXCL (never clobbers an existing file) and O_BINARY on Windows.
+    dirname, basename = os.path.split(filepath)
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=basename + ".", suffix=TMP_SUFFIX, dir=dirname)
+    except OSError as e:
+        return e
+    try:
+        try:
+            view = memoryview(new_raw)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except OSError as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return e
+    return None
+
+
+def write_staged(staged):
+    """Write staged file contents back to disk. Returns {filepath: error} for failed writes."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        errors = list(executor.map(_write_file, staged.items()))
+    return {filepath: error for filepath, error in zip(staged, errors) if error is not None}
+
+
+def rename_path(old_path, new_path):
+    """Rename an existing file or directory, creating the parent of new_path."""
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+    try:
+        os.replace(old_path, new_path)
+    except OSError as e:
+        # Cross-device rename (e.g. bind mounts): fall back to copy + delete
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(old_path, new_path)
 
-    old_path = os.path.join(root, old_name)
-    new_path = os.path.join(root, new_name)
 
-    if os.path.exists(old_path):
-        # Ensure parent of new_path exists
-        os.makedirs(os.path.dirname(new_path), exist_ok=True)
-        shutil.move(old_path, new_path)
-        return True
-    return False
+def get_current_branch(git_dir):
+    """Return the checked-out branch from .git/HEAD (no git subprocess), or None if detached."""
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    prefix = "ref: refs/heads/"
+    if head.startswith(prefix):
+        return head[len(prefix):]
+    return None
 
 
 # ── Main ─────────────────────────────────────────────────────────────────────
@@ -133,6 +235,11 @@ def main():
     root = get_project_root()
     values = prompt_values()
 
+    # Short-circuit before building any paths or touching the tree
+    if all(values[key] == default for key, _, default in PROMPTS):
+        print("\n  All values match defaults. Nothing to change.")
+        return
+
     # Build replacement pairs: (old, new, label)
     replacements = [
         (PROMPTS[0][2], values["project_name"],   "project name"),
@@ -159,17 +266,24 @@ def main():
          os.path.join("ddls", "_account", "warehouses", f"{values['warehouse_name']}.sql")),
     ]
 
-    # Filter out no-ops
+    # Filter out no-ops; resolve rename paths and display names once:
+    # (old, shown_new, old_path, new_path)
     replacements = [(old, new, label) for old, new, label in replacements if old != new]
-    dir_renames = [(old, new) for old, new in dir_renames if old != new]
-    file_renames = [(old, new) for old, new in file_renames if old != new]
-
-    if not replacements and not dir_renames and not file_renames:
-        print("\n  All values match defaults. Nothing to change.")
-        return
+    dir_renames = [
+        (old, new, os.path.join(root, old), os.path.join(root, new))
+        for old, new in dir_renames if old != new
+    ]
+    file_renames = [
+        (old, os.path.basename(new), os.path.join(root, old), os.path.join(root, new))
+        for old, new in file_renames if old != new
+    ]
 
-    # Collect text files for scanning
+    # Collect text files and stage replaced content (single read per file)
     text_files = collect_text_files(root)
+    pattern, mapping = compile_replacements(
+        [(old, new) for old, new, _ in replacements],
+    )
+    staged, counts = scan_and_stage(text_files, pattern, mapping)
 
     # ── Dry-run summary ──────────────────────────────────────────────────
 
@@ -177,21 +291,39 @@ def main():
     print("  Changes to apply:")
 
     for old, new, label in replacements:
-        total, files = count_replacements(text_files, old, new)
+        total, files = counts[old]
         if total > 0:
             print(f"    - Replace '{old}' -> '{new}' ({total} occurrences in {files} files)")
         else:
             print(f"    - Replace '{old}' -> '{new}' (0 occurrences found)")
 
-    for old, new in dir_renames:
-        old_path = os.path.join(root, old)
-        if os.path.exists(old_path):
-            print(f"    - Rename directory: {old} -> {new}")
-
-    for old, new in file_renames:
-        old_path = os.path.join(root, old)
-        if os.path.exists(old_path):
-            print(f"    - Rename file: {old} -> {os.path.basename(new)}")
+    # Stat each rename source once; the apply phase reuses these lists
+    dir_renames = [rename for rename in dir_renames if os.path.exists(rename[2])]
+    file_renames = [rename for rename in file_renames if os.path.exists(rename[2])]
+
+    for old, shown_new, _, _ in dir_renames:
+        print(f"    - Rename directory: {old} -> {shown_new}")
+
+    for old, shown_new, _, _ in file_renames:
+        print(f"    - Rename file: {old} -> {shown_new}")
+
+    # os.replace raises on existing directory targets and silently overwrites
+    # existing files, as does a second rename onto the same target in this run;
+    # refuse before anything is written
+    renames = dir_renames + file_renames
+    target_counts = collections.Counter(new_path for _, _, _, new_path in renames)
+    conflicts = [
+        (old, shown_new)
+        for old, shown_new, old_path, new_path in renames
+        if target_counts[new_path] > 1
+        or (os.path.exists(new_path) and not os.path.samefile(old_path, new_path))
+    ]
+    if conflicts:
+        print()
+        for old, shown_new in conflicts:
+            print(f"  Cannot rename {old} -> {shown_new}: target already exists or is reused.")
+        print("  Aborted. Choose a different name or remove the existing path.")
+        return
 
     print()
     confirm = input("  Apply these changes? [Y/n]: ").strip().lower()
@@ -201,27 +333,38 @@ def main():
 
     # ── Apply changes ────────────────────────────────────────────────────
 
-    # 1. Rename directories first (before file content replacement)
-    for old, new in dir_renames:
-        if rename_path(root, old, new):
-            print(f"  Renamed: {old} -> {new}")
-
-    # 2. Rename individual files
-    for old, new in file_renames:
-        if rename_path(root, old, new):
-            print(f"  Renamed: {old} -> {os.path.basename(new)}")
-
-    # 3. Re-collect text files after renames
-    text_files = collect_text_files(root)
+    # 1. Write staged file contents (before renames, so staged paths stay valid)
+    failed = write_staged(staged)
+    total_replacements = sum(
+        count for filepath, (_, count) in staged.items() if filepath not in failed
+    )
+    # Staged paths are realpaths (see scan_and_stage); resolve root to match
+    real_root = os.path.realpath(root)
+    for filepath, error in failed.items():
+        print(f"  Failed to write {os.path.relpath(filepath, real_root)}: {error}")
+
+    # 2. Rename directories
+    for old, shown_new, old_path, new_path in dir_renames:
+        try:
+            rename_path(old_path, new_path)
+        except OSError as e:
+            print(f"  Failed to rename {old} -> {shown_new}: {e}")
+            continue
+        print(f"  Renamed: {old} -> {shown_new}")
 
-    # 4. Replace file contents
-    total_replacements = 0
-    for old, new, label in replacements:
-        count = replace_in_files(text_files, old, new)
-        total_replacements += count
+    # 3. Rename individual files
+    for old, shown_new, old_path, new_path in file_renames:
+        try:
+            rename_path(old_path, new_path)
+        except OSError as e:
+            print(f"  Failed to rename {old} -> {shown_new}: {e}")
+            continue
+        print(f"  Renamed: {old} -> {shown_new}")
 
     print()
     print(f"  Done! {total_replacements} replacements applied.")
+    if failed:
+        print(f"  {len(failed)} file(s) could not be written (see above); fix and re-run.")
 
     # ── Git remote & initial commit ───────────────────────────────────────
 
@@ -249,11 +392,7 @@ def main():
                 print(f"  Remote origin set to: {repo_url}")
 
             # Detect current branch
-            result = subprocess.run(
-                ["git", "branch", "--show-current"],
-                cwd=root, capture_output=True, text=True,
-            )
-            branch = result.stdout.strip() or "main"
+            branch = get_current_branch(git_dir) or "main"
 
             # Offer initial commit + push
             print()
@@ -262,17 +401,23 @@ def main():
             ).strip().lower()
 
             if not push_confirm or push_confirm == "y":
-                subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+                # git add -A only re-hashes files whose stat data changed and honours
+                # .gitignore, so it stays cheap even for the initial commit.
+                # Discard stdout (per-file listings on large commits); errors still reach stderr
+                subprocess.run(
+                    ["git", "add", "-A"],
+                    cwd=root, check=True, stdout=subprocess.DEVNULL,
+                )
                 subprocess.run(
                     ["git", "commit", "-m", "Initialize project from dbt-workflow template"],
-                    cwd=root, check=True,
+                    cwd=root, check=True, stdout=subprocess.DEVNULL,
                 )
                 print(f"  Initial commit created.")
 
                 try:
                     subprocess.run(
                         ["git", "push", "-u", "origin", branch],
-                        cwd=root, check=True,
+                        cwd=root, check=True, stdout=subprocess.DEVNULL,
                     )
                     print(f"  Pushed to origin/{branch}.")
                 except subprocess.CalledProcessError as e: